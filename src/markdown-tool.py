@@ -1,18 +1,59 @@
+import bisect
+import collections
+import functools
 import re
-
-class Token:
+import sys
+
+# A single token. A namedtuple avoids the per-instance __dict__ a regular
+# class would carry, which matters when a large file produces many tokens.
+Token = collections.namedtuple('Token', ['token_type', 'value', 'line', 'column'])
+
+# An ordered list item opener: one or more digits, a dot, a space.
+_OL_RE = re.compile(r'\d+\. ')
+
+# Character classes for the main-loop dispatch. Each significant character
+# gets a small class code; translating a latin-1 view of the text through
+# this table classifies every character in one C-level pass. Class 0 is
+# plain text. The order here must match the handler tuple built by
+# _build_class_handlers.
+_CLASS_CHARS = ('\\', '#', '*', '+', '-', '_', '0123456789', '>', '`', '|', '<', '[', '~', '\n')
+
+def _build_class_table():
+    table = bytearray(256)
+    for code, chars in enumerate(_CLASS_CHARS, start=1):
+        for ch in chars:
+            table[ord(ch)] = code
+    return bytes(table)
+
+_CLASS_TABLE = _build_class_table()
+
+# Heading token types indexed by level - 1, interned so every heading token
+# shares one string instead of building a fresh f-string per heading. Other
+# token types are written as literals, which CPython already interns.
+_HEADING_TOKENS = tuple(sys.intern(f'HEADING_{level}') for level in range(1, 7))
+
+# A whole line of rule markers (mixed markers allowed, matching the original
+# character-set check; the block handler rejects malformed combinations).
+# The regex is only used for mid-line probes; whole lines go through
+# _is_rule_line, which is cheaper.
+_HR_RE = re.compile(r'[-*_]{3,}[ \t]*$')
+
+def _is_rule_line(line):
     """
-    A class representing a single token.
+    Check whether a whole line consists of three or more rule markers.
     """
+    stripped = line.strip()
+    return len(stripped) >= 3 and not stripped.strip('-*_')
 
-    def __init__(self, token_type, value, line, column):
-        self.token_type = token_type
-        self.value = value
-        self.line = line
-        self.column = column
+# A fenced code block: optional language after the opening fence, then
+# everything up to the closing fence.
+_FENCE_RE = re.compile(r'```([^\n]*)\n(.*?)```', re.DOTALL)
 
-    def __repr__(self):
-        return f'Token({self.token_type}, {repr(self.value)}, line={self.line}, column={self.column})'
+# Inline spans: the closing marker must match the opening one and appear on
+# the same line.
+_STRONG_RE = re.compile(r'(\*\*|__)([^\n]*?)\1')
+_EMPHASIS_RE = re.compile(r'([*_])([^\n]*?)\1')
+_STRIKE_RE = re.compile(r'~~([^\n]*?)~~')
 
 
 class MarkdownLexer:
@@ -22,51 +63,109 @@ class MarkdownLexer:
 
     def __init__(self, file_content):
         self.text = file_content
+        self._len = len(file_content)
         self.position = 0
         self.line = 1
         self.column = 1
-        self.tokens = []
-        self._tokenize()
+        self._pending = []
+        self.lines = file_content.splitlines(keepends=True)
+        self._line_starts = self._build_line_starts()
+        self._hr_lines = [_is_rule_line(line) for line in self.lines]
+        self._stream = self._tokenize()
+
+    def __iter__(self):
+        return self._stream
+
+    def _build_line_starts(self):
+        """
+        Compute the text offset of the start of each line, with a sentinel
+        entry for the end of the text.
+        """
+        starts = []
+        offset = 0
+        for line in self.lines:
+            starts.append(offset)
+            offset += len(line)
+        starts.append(offset)
+        return starts
+
+    @classmethod
+    def _build_dispatch_tables(cls):
+        """
+        Build the dispatch tables shared by all instances, holding plain
+        functions called with the instance as their first argument.
+
+        _CLASS_HANDLERS is indexed by character class: entry 0 is the
+        plain-text fallback and the rest line up with _CLASS_CHARS.
+        _LINE_DISPATCH is the block-opener prefix table used at the start
+        of each line: first character -> ordered (prefix, handler) pairs.
+        Ambiguous prefixes route to the chooser handlers, which validate
+        the rest of the line.
+        """
+        cls._CLASS_HANDLERS = (
+            cls._lex_paragraph_or_text,
+            cls._handle_escape_sequence,
+            cls._lex_heading,
+            cls._handle_asterisk,
+            cls._handle_plus,
+            cls._handle_dash,
+            cls._handle_underscore,
+            cls._handle_digit,
+            cls._lex_blockquote,
+            cls._lex_code_block,
+            cls._lex_table,
+            cls._lex_html_block,
+            cls._handle_bracket,
+            cls._lex_strikethrough,
+            cls._advance_line,
+        )
+
+        table = {
+            '#': [('#' * level + ' ', cls._lex_heading) for level in range(6, 0, -1)],
+            '-': [('---', cls._handle_dash), ('- ', cls._lex_unordered_list_item)],
+            '*': [('***', cls._handle_asterisk), ('* ', cls._lex_unordered_list_item)],
+            '_': [('___', cls._handle_underscore)],
+            '+': [('+ ', cls._lex_unordered_list_item)],
+            '>': [('> ', cls._lex_blockquote)],
+            '`': [('```', cls._lex_code_block)],
+            '|': [('|', cls._lex_table)],
+        }
+        for digit in '0123456789':
+            table[digit] = [(digit, cls._handle_digit)]
+        cls._LINE_DISPATCH = table
 
     def _tokenize(self):
         """
-        Tokenize the entire file content based on markdown grammar.
-        """
-        while self.position < len(self.text):
-            current_char = self.text[self.position]
-
-            if current_char == '\\':
-                self._handle_escape_sequence()
-            elif current_char == '#':
-                self._lex_heading()
-            elif current_char == '*':
-                self._handle_asterisk()
-            elif current_char == '+':
-                self._handle_plus()
-            elif current_char == '-':
-                self._handle_dash()
-            elif current_char == '_':
-                self._handle_underscore()
-            elif current_char.isdigit():
-                self._handle_digit()
-            elif current_char == '>':
-                self._lex_blockquote()
-            elif current_char == '`':
-                self._lex_code_block()
-            elif current_char == '|':
-                self._lex_table()
-            elif current_char == '<':
-                self._lex_html_block()
-            elif current_char == '[':
-                self._handle_bracket()
-            elif current_char == '~':
-                self._lex_strikethrough()
-            elif current_char == '\n':
-                self._advance_line()
-            else:
-                self._lex_paragraph_or_text()
-
-        self.tokens.append(Token('EOF', None, self.line, self.column))
+        Lazily tokenize the file content based on markdown grammar,
+        yielding tokens as each construct is recognised.
+        """
+        text = self.text
+        n = self._len
+        classes = text.encode('latin-1', 'replace').translate(_CLASS_TABLE)
+        handlers = self._CLASS_HANDLERS
+        line_dispatch_get = self._LINE_DISPATCH.get
+        pending = self._pending
+
+        while self.position < n:
+            pos = self.position
+            handler = None
+            if self.column == 1:
+                entries = line_dispatch_get(text[pos])
+                if entries is not None:
+                    for prefix, candidate in entries:
+                        if text.startswith(prefix, pos):
+                            handler = candidate
+                            break
+
+            if handler is None:
+                handler = handlers[classes[pos]]
+            handler(self)
+
+            if pending:
+                yield from pending
+                pending.clear()
+
+        yield Token('EOF', None, self.line, self.column)
 
     # New functions to handle specific characters
 
@@ -79,17 +178,18 @@ class MarkdownLexer:
         start_column = self.column
 
         # Ensure there is another character after the backslash
-        if self.position + 1 < len(self.text):
+        if self.position + 1 < self._len:
             # Generate a TEXT token for the escaped character
             escaped_char = self.text[self.position + 1]
-            self.tokens.append(Token('TEXT', escaped_char, start_line, start_column))
+            self._pending.append(Token('TEXT', escaped_char, start_line, start_column))
 
-            # Advance past the backslash and the escaped character
+            # Advance past the backslash and the escaped character; the
+            # escaped character may itself be a newline
+            self._advance_over(self.text[self.position:self.position + 2])
             self.position += 2
-            self.column += 2
         else:
             # If backslash is at the end of the text, treat it as a literal backslash
-            self.tokens.append(Token('TEXT', '\\', start_line, start_column))
+            self._pending.append(Token('TEXT', '\\', start_line, start_column))
             self._advance()
 
     def _handle_asterisk(self):
@@ -133,7 +233,7 @@ class MarkdownLexer:
 
     def _handle_digit(self):
         """ Handle digit character: can be part of an ordered list item. """
-        if self._peek_next_char(1) == '.':
+        if _OL_RE.match(self.text, self.position):
             self._lex_ordered_list_item()
         else:
             self._lex_paragraph_or_text()  # Assume it's text if not part of an ordered list
@@ -147,22 +247,27 @@ class MarkdownLexer:
         start_line = self.line
         start_column = self.column
 
-        level = 0
-        while self._peek_next_char() == '#':
-            self._advance()
-            level += 1
+        text = self.text
+        pos = self.position
+        n = self._len
+        while pos < n and text[pos] == '#':
+            pos += 1
+
+        level = pos - self.position
+        self.column += level
+        self.position = pos
 
         if level > 6:
-            self.tokens.append(Token('ERROR', 'Invalid heading level (too many #)', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Invalid heading level (too many #)', start_line, start_column))
             return
 
         if self._peek_next_char() != ' ':
-            self.tokens.append(Token('ERROR', 'Expected space after heading #', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Expected space after heading #', start_line, start_column))
             return
 
         self._advance()  # skip space
-        value = self._read_until('\n')
-        self.tokens.append(Token(f'HEADING_{level}', value.strip(), start_line, start_column))
+        value = self._consume_rest_of_line()
+        self._pending.append(Token(_HEADING_TOKENS[level - 1], value.strip(), start_line, start_column))
 
     def _lex_unordered_list_item(self):
         """
@@ -173,12 +278,12 @@ class MarkdownLexer:
 
         marker = self._advance()  # * or - or +
         if self._peek_next_char() != ' ':
-            self.tokens.append(Token('ERROR', f'Expected space after list marker "{marker}"', start_line, start_column))
+            self._pending.append(Token('ERROR', f'Expected space after list marker "{marker}"', start_line, start_column))
             return
 
         self._advance()  # skip space
-        value = self._read_until('\n')
-        self.tokens.append(Token('UNORDERED_LIST_ITEM', value.strip(), start_line, start_column))
+        value = self._consume_rest_of_line()
+        self._pending.append(Token('UNORDERED_LIST_ITEM', value.strip(), start_line, start_column))
 
     def _lex_ordered_list_item(self):
         """
@@ -189,17 +294,17 @@ class MarkdownLexer:
 
         number = self._read_digits()
         if self._peek_next_char() != '.':
-            self.tokens.append(Token('ERROR', 'Expected "." after ordered list number', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Expected "." after ordered list number', start_line, start_column))
             return
 
         self._advance()  # skip dot
         if self._peek_next_char() != ' ':
-            self.tokens.append(Token('ERROR', 'Expected space after "." in ordered list item', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Expected space after "." in ordered list item', start_line, start_column))
             return
 
         self._advance()  # skip space
-        value = self._read_until('\n')
-        self.tokens.append(Token('ORDERED_LIST_ITEM', value.strip(), start_line, start_column))
+        value = self._consume_rest_of_line()
+        self._pending.append(Token('ORDERED_LIST_ITEM', value.strip(), start_line, start_column))
 
     def _lex_blockquote(self):
         """
@@ -210,12 +315,12 @@ class MarkdownLexer:
 
         self._advance()  # skip >
         if self._peek_next_char() != ' ':
-            self.tokens.append(Token('ERROR', 'Expected space after ">" in blockquote', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Expected space after ">" in blockquote', start_line, start_column))
             return
 
         self._advance()  # skip space
-        value = self._read_until('\n')
-        self.tokens.append(Token('BLOCKQUOTE', value.strip(), start_line, start_column))
+        value = self._consume_rest_of_line()
+        self._pending.append(Token('BLOCKQUOTE', value.strip(), start_line, start_column))
 
     def _lex_code_block(self):
         """
@@ -224,32 +329,20 @@ class MarkdownLexer:
         start_line = self.line
         start_column = self.column
 
-        self._advance()  # skip the first backtick
-
-        # Capture the language type if it exists
-        language = ''
-        if self.text[self.position:self.position+2] == '``':
-            self.position += 2  # skip the next two backticks
-            self.column += 2
-
-        # Check if there's a language specified right after the backticks
-        if not self.text[self.position:self.position+1].isspace() and self.text[self.position:self.position+1] != '\n':
-            language_start = self.position
-            while self.position < len(self.text) and self.text[self.position] not in ['\n', ' ']:
-                self._advance()
-            language = self.text[language_start:self.position].strip()
-
-        self._advance()  # skip newline after language or backticks
-        value = self._read_until('```')
-
-        if not self.text[self.position:self.position+3] == '```':
-            self.tokens.append(Token('ERROR', 'Unclosed code block', start_line, start_column))
+        m = _FENCE_RE.match(self.text, self.position)
+        if not m:
+            # An unterminated fence consumes the rest of the input.
+            self._pending.append(Token('ERROR', 'Unclosed code block', start_line, start_column))
+            self._advance_over(self.text[self.position:])
+            self.position = self._len
             return
 
-        self.tokens.append(Token('CODE_BLOCK', {'language': language, 'content': value.strip()}, start_line, start_column))
-        self._advance()  # skip the closing ```
-        self._advance()
-        self._advance()
+        language = m.group(1).strip()
+        value = m.group(2)
+        self._pending.append(Token('CODE_BLOCK', {'language': language, 'content': value.strip()}, start_line, start_column))
+
+        self._advance_over(m.group(0))
+        self.position = m.end()
 
     def _lex_horizontal_rule(self):
         """
@@ -257,10 +350,11 @@ class MarkdownLexer:
         """
         start_line = self.line
         start_column = self.column
+        start_position = self.position
 
         # Check if we have a valid horizontal rule pattern (e.g., "---", "***", "___")
         if self.text[self.position:self.position+3] not in ['---', '***', '___']:
-            self.tokens.append(Token('ERROR', 'Invalid horizontal rule', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Invalid horizontal rule', start_line, start_column))
             return
 
         # Advance past the horizontal rule characters
@@ -270,23 +364,19 @@ class MarkdownLexer:
         # Check if the rest of the line contains only whitespace or a newline
         rest_of_line = self._read_until('\n').strip()
         if rest_of_line:
-            self.tokens.append(Token('ERROR', 'Invalid characters after horizontal rule', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Invalid characters after horizontal rule', start_line, start_column))
             return
 
-        self.tokens.append(Token('HORIZONTAL_RULE', self.text[start_column-1:self.position], start_line, start_column))
+        self._pending.append(Token('HORIZONTAL_RULE', self.text[start_position:self.position].strip(), start_line, start_column))
 
     def _is_horizontal_rule(self):
         """
         Check if the current line represents a horizontal rule.
         """
-        start_pos = self.position
-        line_content = self._read_until('\n').strip()
-        self.position = start_pos  # Reset position to original
-
-        # Horizontal rules are typically 3 or more '-', '*', or '_' characters
-        if len(line_content) >= 3 and all(c in ['-', '*', '_'] for c in line_content):
-            return True
-        return False
+        index = self._line_index()
+        if self.position == self._line_starts[index]:
+            return self._hr_lines[index]
+        return _HR_RE.match(self.text, self.position, self._line_end()) is not None
 
     def _lex_table(self):
         """
@@ -295,16 +385,16 @@ class MarkdownLexer:
         start_line = self.line
         start_column = self.column
 
-        header = self._read_until('\n')
-        divider = self._read_until('\n')
-        self.tokens.append(Token('TABLE_HEADER', header.strip(), start_line, start_column))
-        self.tokens.append(Token('TABLE_DIVIDER', divider.strip(), self.line, self.column))
+        header = self._consume_rest_of_line()
+        divider = self._consume_rest_of_line()
+        self._pending.append(Token('TABLE_HEADER', header.strip(), start_line, start_column))
+        self._pending.append(Token('TABLE_DIVIDER', divider.strip(), self.line, self.column))
 
         while self._peek_next_char() == '|':
             start_line = self.line
             start_column = self.column
-            row = self._read_until('\n')
-            self.tokens.append(Token('TABLE_ROW', row.strip(), start_line, start_column))
+            row = self._consume_rest_of_line()
+            self._pending.append(Token('TABLE_ROW', row.strip(), start_line, start_column))
 
     def _lex_html_block(self):
         """
@@ -314,7 +404,7 @@ class MarkdownLexer:
         start_column = self.column
 
         value = self._read_until('>')
-        self.tokens.append(Token('HTML_BLOCK', value.strip(), start_line, start_column))
+        self._pending.append(Token('HTML_BLOCK', value.strip(), start_line, start_column))
         self._advance()  # skip '>'
 
     def _lex_footnote(self):
@@ -326,7 +416,7 @@ class MarkdownLexer:
 
         # Check if it's a valid footnote start
         if self._peek_next_char() != '[' or self._peek_next_char(1) != '^':
-            self.tokens.append(Token('ERROR', 'Expected footnote format [^digit]:', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Expected footnote format [^digit]:', start_line, start_column))
             return
 
         self._advance()  # skip '['
@@ -335,19 +425,19 @@ class MarkdownLexer:
 
         # Validate footnote digit and closing bracket
         if not digit or self._peek_next_char() != ']':
-            self.tokens.append(Token('ERROR', 'Malformed footnote syntax', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Malformed footnote syntax', start_line, start_column))
             return
 
         self._advance()  # skip ']'
 
         # Validate colon after the footnote digit
         if self._peek_next_char() != ':':
-            self.tokens.append(Token('ERROR', 'Expected ":" after footnote number', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Expected ":" after footnote number', start_line, start_column))
             return
 
         self._advance()  # skip ':'
-        value = self._read_until('\n')
-        self.tokens.append(Token('FOOTNOTE', f'{digit}: {value.strip()}', start_line, start_column))
+        value = self._consume_rest_of_line()
+        self._pending.append(Token('FOOTNOTE', f'{digit}: {value.strip()}', start_line, start_column))
 
     def _lex_link_or_image(self):
         """
@@ -363,7 +453,7 @@ class MarkdownLexer:
 
         # Validate the opening bracket
         if self._peek_next_char() != '[':
-            self.tokens.append(Token('ERROR', 'Expected "[" to start link/image text', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Expected "[" to start link/image text', start_line, start_column))
             return
 
         self._advance()  # skip '['
@@ -371,14 +461,14 @@ class MarkdownLexer:
 
         # Validate the closing bracket for alt text
         if self._peek_next_char() != ']':
-            self.tokens.append(Token('ERROR', 'Expected closing "]" for link/image text', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Expected closing "]" for link/image text', start_line, start_column))
             return
 
         self._advance()  # skip ']'
 
         # Validate the opening parenthesis for URL
         if self._peek_next_char() != '(':
-            self.tokens.append(Token('ERROR', 'Expected "(" to start link/image URL', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Expected "(" to start link/image URL', start_line, start_column))
             return
 
         self._advance()  # skip '('
@@ -386,15 +476,15 @@ class MarkdownLexer:
 
         # Validate the closing parenthesis for URL
         if self._peek_next_char() != ')':
-            self.tokens.append(Token('ERROR', 'Expected closing ")" for link/image URL', start_line, start_column))
+            self._pending.append(Token('ERROR', 'Expected closing ")" for link/image URL', start_line, start_column))
             return
 
         self._advance()  # skip ')'
 
         if is_image:
-            self.tokens.append(Token('IMAGE', {'alt_text': alt_text, 'url': url}, start_line, start_column))
+            self._pending.append(Token('IMAGE', {'alt_text': alt_text, 'url': url}, start_line, start_column))
         else:
-            self.tokens.append(Token('LINK', {'text': alt_text, 'url': url}, start_line, start_column))
+            self._pending.append(Token('LINK', {'text': alt_text, 'url': url}, start_line, start_column))
 
     def _lex_emphasis_or_strong(self):
         """
@@ -405,55 +495,34 @@ class MarkdownLexer:
         start_line = self.line
         start_column = self.column
 
-        marker = self._peek_next_char()
-
         # Check if it's a strong emphasis (e.g., '**' or '__')
         if self.text[self.position:self.position+2] in ['**', '__']:
-            marker = self.text[self.position:self.position + 2]
-            self.position += 2  # Skip '**' or '__'
-            self.column += 2
-
-            end_pos = self.position
-            while end_pos < len(self.text) and self.text[end_pos:end_pos+2] != marker and self.text[end_pos] != '\n':
-                end_pos += 1
-
-            if end_pos >= len(self.text) or self.text[end_pos] == '\n':
-                # No closing marker found on the same line, treat it as plain text
-                self.tokens.append(Token('TEXT', marker + self.text[self.position:end_pos], start_line, start_column))
-                self.position = end_pos  # Move to the newline or end of the text
-                self.column += end_pos - self.position
+            m = _STRONG_RE.match(self.text, self.position)
+            if m:
+                self._pending.append(Token('STRONG', m.group(2).strip(), start_line, start_column))
+                self.column += len(m.group(0))
+                self.position = m.end()
                 return
+            marker_len = 2
 
-            # Closing '**' or '__' found on the same line
-            value = self.text[self.position:end_pos]
-            self.tokens.append(Token('STRONG', value.strip(), start_line, start_column))
-            self.position = end_pos + 2  # Move past the closing '**' or '__'
-            self.column += len(value) + 2
-
-        # Check if it's an emphasis (e.g., '*' or '_')
-        elif marker in ['*', '_']:
-            self._advance()  # Skip '*' or '_'
-            end_pos = self.position
-            while end_pos < len(self.text) and self.text[end_pos] != marker and self.text[end_pos] != '\n':
-                end_pos += 1
-
-            if end_pos >= len(self.text) or self.text[end_pos] == '\n':
-                # No closing marker found on the same line, treat it as plain text
-                self.tokens.append(Token('TEXT', marker + self.text[self.position:end_pos], start_line, start_column))
-                self.position = end_pos  # Move to the newline or end of the text
-                self.column += end_pos - self.position
+        # Otherwise it's an emphasis candidate (e.g., '*' or '_')
+        else:
+            m = _EMPHASIS_RE.match(self.text, self.position)
+            if m:
+                self._pending.append(Token('EMPHASIS', m.group(2).strip(), start_line, start_column))
+                self.column += len(m.group(0))
+                self.position = m.end()
                 return
+            marker_len = 1
 
-            # Closing '*' or '_' found on the same line
-            value = self.text[self.position:end_pos]
-            self.tokens.append(Token('EMPHASIS', value.strip(), start_line, start_column))
-            self.position = end_pos + 1  # Move past the closing '*' or '_'
-            self.column += len(value) + 1
+        # No closing marker found on the same line, treat the run as plain text
+        end_pos = self.text.find('\n', self.position + marker_len)
+        if end_pos == -1:
+            end_pos = self._len
 
-        else:
-            # Not a valid emphasis or strong, treat it as plain text
-            self.tokens.append(Token('TEXT', marker, start_line, start_column))
-            self._advance()
+        self._pending.append(Token('TEXT', self.text[self.position:end_pos], start_line, start_column))
+        self.column += end_pos - self.position
+        self.position = end_pos
 
     def _lex_strikethrough(self):
         """
@@ -466,30 +535,26 @@ class MarkdownLexer:
         start_column = self.column
 
         # Check if it's a strikethrough (e.g., '~~')
-        if self.text[self.position:self.position+2] == '~~' and self.text[self.position+2] != '~':
-            self.position += 2  # Skip the opening '~~'
-            self.column += 2
-
-            end_pos = self.position
-            while end_pos < len(self.text) and self.text[end_pos:end_pos+2] != '~~' and self.text[end_pos] != '\n':
-                end_pos += 1
-
-            if end_pos >= len(self.text) or self.text[end_pos] == '\n':
-                # No closing marker found on the same line, treat it as plain text
-                self.tokens.append(Token('TEXT', '~~' + self.text[self.position:end_pos], start_line, start_column))
-                self.position = end_pos  # Move to the newline or end of the text
-                self.column += end_pos - self.position
+        if self.text.startswith('~~', self.position) and not self.text.startswith('~~~', self.position):
+            m = _STRIKE_RE.match(self.text, self.position)
+            if m:
+                self._pending.append(Token('STRIKETHROUGH', m.group(1).strip(), start_line, start_column))
+                self.column += len(m.group(0))
+                self.position = m.end()
                 return
 
-            # Closing '~~' found on the same line
-            value = self.text[self.position:end_pos]
-            self.tokens.append(Token('STRIKETHROUGH', value.strip(), start_line, start_column))
-            self.position = end_pos + 2  # Move past the closing '~~'
-            self.column += len(value) + 2
+            # No closing marker found on the same line, treat the run as plain text
+            end_pos = self.text.find('\n', self.position + 2)
+            if end_pos == -1:
+                end_pos = self._len
+
+            self._pending.append(Token('TEXT', self.text[self.position:end_pos], start_line, start_column))
+            self.column += end_pos - self.position
+            self.position = end_pos
 
         else:
             # If it's not exactly two '~' or more than two '~', treat it as plain text
-            self.tokens.append(Token('TEXT', self._advance(), start_line, start_column))
+            self._pending.append(Token('TEXT', self._advance(), start_line, start_column))
 
     def _lex_paragraph_or_text(self):
         """
@@ -498,33 +563,90 @@ class MarkdownLexer:
         start_line = self.line
         start_column = self.column
 
-        value = self._read_until('\n\n')
+        idx = self.text.find('\n\n', self.position)
+        if idx == -1:
+            idx = self._len
+
+        value = self.text[self.position:idx]
         if value:
-            self.tokens.append(Token('PARAGRAPH', value.strip(), start_line, start_column))
+            self._pending.append(Token('PARAGRAPH', value.strip(), start_line, start_column))
+
+        self._advance_over(value)
+        self.position = idx
+
+    def _line_index(self):
+        """
+        Return the index into self.lines of the line containing the current
+        position, derived from the position itself so it stays correct even
+        if the line counter drifts.
+        """
+        return bisect.bisect_right(self._line_starts, self.position) - 1
+
+    def _line_end(self):
+        """
+        Return the offset of the end of the current line, excluding its
+        trailing newline.
+        """
+        end = self._line_starts[min(self._line_index() + 1, len(self.lines))]
+        if end > self.position and self.text[end - 1] == '\n':
+            end -= 1
+        return end
+
+    def _consume_rest_of_line(self):
+        """
+        Read from the current position to the end of the current line,
+        leaving the position on the newline.
+        """
+        end = self._line_end()
+        value = self.text[self.position:end]
+        self.column += end - self.position
+        self.position = end
+        return value
+
+    def _advance_over(self, value):
+        """
+        Update the line and column counters after consuming a slice.
+        """
+        newlines = value.count('\n')
+        if newlines:
+            self.line += newlines
+            self.column = len(value) - value.rfind('\n')
+        else:
+            self.column += len(value)
 
     def _read_until(self, stop_char):
         """
         Read characters until a stop character or string is found.
         """
-        start = self.position
-        while not self.text[self.position:].startswith(stop_char) and self.position < len(self.text):
-            self._advance()
-        return self.text[start:self.position]
+        idx = self.text.find(stop_char, self.position)
+        if idx == -1:
+            idx = self._len
+
+        value = self.text[self.position:idx]
+        self._advance_over(value)
+        self.position = idx
+        return value
 
     def _read_digits(self):
         """
         Read consecutive digits.
         """
-        start = self.position
-        while self._peek_next_char().isdigit():
-            self._advance()
-        return self.text[start:self.position]
+        text = self.text
+        pos = self.position
+        n = self._len
+        start = pos
+        while pos < n and text[pos].isdigit():
+            pos += 1
+
+        self.column += pos - start
+        self.position = pos
+        return text[start:pos]
 
     def _peek_next_char(self, offset=0):
         """
         Peek at the next character without advancing the position.
         """
-        if self.position + offset < len(self.text):
+        if self.position + offset < self._len:
             return self.text[self.position + offset]
         return ''
 
@@ -551,11 +673,29 @@ class MarkdownLexer:
 
     def get_next_token(self):
         """
-        Return the next token from the tokens list.
+        Return the next token from the token stream.
+        """
+        token = next(self._stream, None)
+        if token is None:
+            token = Token('EOF', None, self.line, self.column)
+        return token
+
+    @staticmethod
+    def tokens_for(text):
+        """
+        Return the full token tuple for the given content, memoized on the
+        content so callers that re-tokenize identical input (watchers,
+        editors) share one parse.
         """
-        if self.tokens:
-            return self.tokens.pop(0)
-        return Token('EOF', None, self.line, self.column)
+        return _tokenize_cached(text)
+
+
+MarkdownLexer._build_dispatch_tables()
+
+
+@functools.lru_cache(maxsize=16)
+def _tokenize_cached(text):
+    return tuple(MarkdownLexer(text))
 
 
 if __name__ == '__main__':
@@ -573,8 +713,5 @@ if __name__ == '__main__':
 
     lexer = MarkdownLexer(content)
 
-    while True:
-        token = lexer.get_next_token()
+    for token in lexer:
         print(token)
-        if token.token_type == 'EOF':
-            break